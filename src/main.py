@@ -1,42 +1,248 @@
 import os                    # For file path operations
 import json                  # For parsing LLM output
+import logging               # Progress messages - silent unless the caller configures a handler
+import orjson                # Fast parsing of the extraction JSON
 import re                     # For extracting numbers from damage amounts
+import sys                    # Claim file paths from the command line
+from concurrent.futures import ProcessPoolExecutor  # Batch mode: claims in parallel
 from pdf_extraction import extract_text_from_pdf  # Direct PDF text extraction
 from pathlib import Path      # Cross-platform file paths
 from typing import Dict, List, Optional  # Type hints for clarity
 
-from llama_cpp import Llama   # Local LLM engine (llama.cpp)
+import numpy as np            # Logit rows from the batched decode
+import llama_cpp              # Low-level llama.cpp API for multi-sequence batches
+from llama_cpp import Llama, LlamaGrammar   # Local LLM engine (llama.cpp)
+from llama_cpp.llama_grammar import json_schema_to_gbnf    # Schema -> GBNF, patched below
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+LOG_FORMAT = "%(message)s"
 
 # ---------------------------
 # 1. Configuration & LLM Setup
 # ---------------------------
 
-# Load the local Qwen model - runs offline, no API needed
-llm = Llama(
-    model_path=os.path.join(os.path.dirname(__file__), "model", "qwen2.5-1.5b-instruct-q4_k_m.gguf"),
-    n_ctx=4096,        # Context window size (tokens)
-    n_threads=8,       # CPU cores to use
-    temperature=0,     # 0 = deterministic output
-    verbose=False      # Suppress model loading messages
+# GGUF weights - override FNOL_MODEL_PATH to try a smaller quant (e.g. q4_0, q3_k_s)
+MODEL_PATH = os.environ.get(
+    "FNOL_MODEL_PATH",
+    os.path.join(os.path.dirname(__file__), "model", "qwen2.5-1.5b-instruct-q4_k_m.gguf")
 )
+LLM_THREADS = min(16, os.cpu_count() or 8)   # CPU cores per model instance (lowered per worker in batch mode)
+LLM_N_BATCH = 2048     # Prompt tokens submitted per decode call
+LLM_N_UBATCH = 512     # Physical micro-batch size inside llama.cpp
+USE_MMAP = False       # CPU-only loads read weights into RAM; batch workers re-enable mmap to share one copy
+GPU_THREADS = 4        # With every layer on the GPU, the CPU only feeds batches
+GPU_BATCH_WORKERS = 1  # Batch workers on a GPU build - each one loads a full model copy into VRAM
+LLM_MAX_TOKENS = 800   # Response length limit for the extraction call
+
+# Fixed system prefixes - every call starts with identical tokens so their KV can be reused
+SYSTEM_PREFIX = "<|system|>You are a precise information extraction and reasoning engine.\n"
+BOOL_SYSTEM_PREFIX = "<|system|>Answer ONLY with 'YES' or 'NO'. No explanation.\n"
+
+# Batched Yes/No context - shares the model weights, one llama.cpp sequence per prompt
+BATCH_SEQ_MAX = 4      # One sequence per hybrid agent
+BATCH_N_BATCH = LLM_N_BATCH   # Max tokens submitted per llama_decode
+BOOL_LOGIT_MARGIN = 1.0   # YES/NO logits closer than this count as "unsure"
+
+# Created lazily by get_llm() / init_bool_batch() - each worker process loads its own model and contexts
+llm: Optional[Llama] = None
+batch_ctx = None
+batch_mem = None
+batch = None
+bool_prefix_tokens: List[int] = []
+yes_token = no_token = -1   # Answer token ids, compared by logit
+bool_by_logits: Optional[bool] = None   # Set by init_bool_batch(); False if YES/NO are multi-token
+extraction_prefix_tokens: List[int] = []   # System prefix + extraction head, tokenized once
+extraction_suffix_tokens: List[int] = []   # Closing delimiter + assistant tag, tokenized once
+
+
+def load_model(n_gpu_layers: int, n_threads: int) -> Llama:
+    """Construct the Llama instance with the configured context and batch sizes."""
+    return Llama(
+        model_path=MODEL_PATH,
+        n_gpu_layers=n_gpu_layers,   # -1 = offload every layer to the GPU
+        n_ctx=4096,              # Context window size (tokens)
+        n_threads=n_threads,     # CPU cores to use
+        n_threads_batch=n_threads,
+        n_batch=LLM_N_BATCH,
+        n_ubatch=LLM_N_UBATCH,
+        use_mmap=USE_MMAP if n_gpu_layers == 0 else True,   # Offloaded weights don't need a host-RAM copy
+        temperature=0,           # 0 = deterministic output
+        verbose=False            # Suppress model loading messages
+    )
 
 
-def run_llm(prompt: str) -> str:
-    """Send prompt to local LLM with system instruction."""
-    out = llm(
-        f"<|system|>You are a precise information extraction and reasoning engine.\n"
-        f"<|user|>{prompt}\n<|assistant|>",
-        max_tokens=800,          # Limit response length
-        stop=["<|user|>"]         # Stop at user token
-    )
-    return out["choices"][0]["text"].strip()
+def get_llm() -> Llama:
+    """Load the local Qwen model on first use - runs offline, no API needed."""
+    global llm, extraction_prefix_tokens, extraction_suffix_tokens
+    if llm is None:
+        n_gpu_layers, n_threads = 0, LLM_THREADS
+        if llama_cpp.llama_supports_gpu_offload():   # CUDA/Metal/Vulkan build
+            try:
+                n_gpu_layers, n_threads = -1, min(LLM_THREADS, GPU_THREADS)
+                llm = load_model(n_gpu_layers, n_threads)
+            except (ValueError, RuntimeError) as e:
+                logger.warning("GPU offload failed (%s), falling back to CPU", e)
+                n_gpu_layers, n_threads = 0, LLM_THREADS
+        if llm is None:
+            llm = load_model(n_gpu_layers, n_threads)
+        logger.info(
+            "Loaded model: n_gpu_layers=%s, n_threads=%s, n_batch=%s, n_ubatch=%s, use_mmap=%s",
+            n_gpu_layers, n_threads, LLM_N_BATCH, LLM_N_UBATCH, USE_MMAP or n_gpu_layers != 0
+        )
+        # Prefill the fixed extraction head once - generate() keeps the longest matching prefix
+        # of the live context, so each claim only evaluates its own text
+        extraction_prefix_tokens = llm.tokenize(
+            f"{SYSTEM_PREFIX}<|user|>{EXTRACTION_PROMPT_HEAD}".encode("utf-8"), special=True
+        )
+        llm.eval(extraction_prefix_tokens)
+        extraction_suffix_tokens = llm.tokenize(
+            f"{EXTRACTION_PROMPT_TAIL}\n<|assistant|>".encode("utf-8"), add_bos=False, special=True
+        )
+    return llm
 
 
-def run_llm_bool(prompt: str) -> bool | None:
-    """Run LLM for a Yes/No question. Returns True/False or None if unsure."""
-    out = llm(
-        f"<|system|>Answer ONLY with 'YES' or 'NO'. No explanation.\n"
-        f"<|user|>{prompt}\n<|assistant|>",
+def run_llm(tokens: List[int], grammar: Optional[LlamaGrammar] = None) -> str:
+    """Complete the extraction prompt tokens (extraction_prefix_tokens + FNOL text + suffix)."""
+    out = get_llm()(
+        tokens,                  # Token list - llama.cpp skips its own tokenizer pass
+        max_tokens=LLM_MAX_TOKENS,   # Limit response length
+        stop=["<|user|>"],        # Stop at user token
+        grammar=grammar
+    )
+    choice = out["choices"][0]
+    if choice["finish_reason"] == "length":
+        logger.warning("LLM output hit max_tokens=%s and is likely truncated", LLM_MAX_TOKENS)
+    return choice["text"].strip()
+
+
+def init_bool_batch() -> None:
+    """Create the batched Yes/No context on the loaded model and prefill its shared system prefix."""
+    global batch_ctx, batch_mem, batch, bool_prefix_tokens, yes_token, no_token, bool_by_logits
+
+    # Answer token ids - a Yes/No question is settled by comparing these two logits,
+    # which only works when each answer is exactly one token in this vocab
+    yes_ids = llm.tokenize(b"YES", add_bos=False)
+    no_ids = llm.tokenize(b"NO", add_bos=False)
+    bool_by_logits = False    # Until the context below is ready, decode_bool answers instead
+    if len(yes_ids) != 1 or len(no_ids) != 1:
+        logger.warning("YES/NO are not single tokens for this model, decoding Yes/No answers instead")
+        return
+    yes_token, no_token = yes_ids[0], no_ids[0]
+
+    batch_params = llama_cpp.llama_context_default_params()
+    batch_params.n_ctx = llm.n_ctx()
+    batch_params.n_batch = BATCH_N_BATCH
+    batch_params.n_ubatch = LLM_N_UBATCH
+    batch_params.n_seq_max = BATCH_SEQ_MAX
+    batch_params.kv_unified = True    # Sequences share KV cells, so the system prefix is stored once
+    batch_params.n_threads = llm.context_params.n_threads
+    batch_params.n_threads_batch = llm.context_params.n_threads_batch
+
+    batch_ctx = llama_cpp.llama_init_from_model(llm.model, batch_params)
+    if not batch_ctx:    # NULL, e.g. no VRAM left for a second context after full offload
+        logger.warning("Could not create the Yes/No batch context, decoding Yes/No answers instead")
+        batch_ctx = None
+        return
+    batch_mem = llama_cpp.llama_get_memory(batch_ctx)
+    batch = llama_cpp.llama_batch_init(BATCH_N_BATCH, 0, 1)
+    # Freed with the model - Llama.close() unwinds its exit stack newest first, so before the weights
+    llm._stack.callback(free_bool_batch)
+
+    # The Yes/No system prefix is prefilled once into sequence 0 and copied to the others per call
+    bool_prefix_tokens = llm.tokenize(BOOL_SYSTEM_PREFIX.encode("utf-8"), special=True)
+    try:
+        decode_batch([(t, i, 0, False) for i, t in enumerate(bool_prefix_tokens)])
+    except RuntimeError as e:
+        logger.warning("Yes/No prefix prefill failed (%s), decoding Yes/No answers instead", e)
+        return
+    bool_by_logits = True
+
+
+def free_bool_batch() -> None:
+    """Release the Yes/No context and batch - registered to run when the model is closed."""
+    global batch_ctx, batch_mem, batch, bool_by_logits
+    if batch is not None:
+        llama_cpp.llama_batch_free(batch)
+    if batch_ctx is not None:
+        llama_cpp.llama_free(batch_ctx)
+    batch_ctx = batch_mem = batch = None
+    bool_by_logits = None
+
+
+def decode_batch(entries: List[tuple]) -> Dict[int, np.ndarray]:
+    """Decode (token, pos, seq_id, want_logits) entries in n_batch chunks; return logits by entry index."""
+    logits = {}
+    for start in range(0, len(entries), BATCH_N_BATCH):
+        chunk = entries[start:start + BATCH_N_BATCH]
+        batch.n_tokens = len(chunk)
+        for i, (token, pos, seq_id, want_logits) in enumerate(chunk):
+            batch.token[i] = token
+            batch.pos[i] = pos
+            batch.n_seq_id[i] = 1
+            batch.seq_id[i][0] = seq_id
+            batch.logits[i] = want_logits
+        if llama_cpp.llama_decode(batch_ctx, batch) != 0:
+            raise RuntimeError("llama_decode failed for Yes/No batch")
+        for i, entry in enumerate(chunk):
+            if entry[3]:
+                row = llama_cpp.llama_get_logits_ith(batch_ctx, i)
+                logits[start + i] = np.ctypeslib.as_array(row, shape=(llm.n_vocab(),)).copy()
+    return logits
+
+
+def run_bool_group(prompts: List[str]) -> List[bool | None]:
+    """Prefill up to BATCH_SEQ_MAX Yes/No prompts together and read each answer from the logits."""
+    n_prefix = len(bool_prefix_tokens)
+
+    # Drop the previous call's suffixes and share the cached prefix with every sequence
+    llama_cpp.llama_memory_seq_rm(batch_mem, -1, n_prefix, -1)
+    for seq_id in range(1, len(prompts)):
+        llama_cpp.llama_memory_seq_rm(batch_mem, seq_id, -1, -1)
+        llama_cpp.llama_memory_seq_cp(batch_mem, 0, seq_id, -1, -1)
+
+    # 1. Prefill all prompts in one batch, keeping logits only for each last token
+    entries, last = [], []
+    for seq_id, prompt in enumerate(prompts):
+        tokens = llm.tokenize(f"<|user|>{prompt}\n<|assistant|>".encode("utf-8"), add_bos=False, special=True)
+        for j, token in enumerate(tokens):
+            entries.append((token, n_prefix + j, seq_id, j == len(tokens) - 1))
+        last.append(len(entries) - 1)
+    try:
+        logits = decode_batch(entries)
+    except RuntimeError as e:
+        # e.g. long prompts filling the shared KV cache - the agents' rule checks decide instead
+        logger.warning("Yes/No batch failed (%s), falling back to rule checks", e)
+        return [None] * len(prompts)
+
+    # 2. One forward pass is enough: compare the YES and NO logits of the next token
+    results = []
+    for i in last:
+        diff = float(logits[i][yes_token] - logits[i][no_token])
+        results.append(None if abs(diff) < BOOL_LOGIT_MARGIN else diff > 0)
+    return results
+
+
+def run_llm_bool_batch(prompts: List[Optional[str]]) -> List[bool | None]:
+    """Run several Yes/No questions as parallel sequences. None prompts are skipped and return None."""
+    get_llm()
+    if bool_by_logits is None:
+        init_bool_batch()    # Only claims the extraction call left undecided pay for this context
+    if not bool_by_logits:
+        return [decode_bool(p) if p else None for p in prompts]
+    results: List[bool | None] = [None] * len(prompts)
+    active = [i for i, p in enumerate(prompts) if p]
+    for start in range(0, len(active), BATCH_SEQ_MAX):
+        group = active[start:start + BATCH_SEQ_MAX]
+        for i, result in zip(group, run_bool_group([prompts[i] for i in group])):
+            results[i] = result
+    return results
+
+
+def decode_bool(prompt: str) -> bool | None:
+    """Answer one Yes/No question by generating text - used when YES/NO are not single tokens."""
+    out = get_llm()(
+        f"{BOOL_SYSTEM_PREFIX}<|user|>{prompt}\n<|assistant|>",
         max_tokens=10,
         stop=["<|user|>", "\n"]
     )
@@ -48,22 +254,27 @@ def run_llm_bool(prompt: str) -> bool | None:
     return None
 
 
-def extract_json(text: str) -> str:
-    """Find and extract valid JSON object from LLM output."""
+def extract_json(text: str) -> Dict:
+    """Find and parse the JSON object in LLM output."""
     start = text.find("{")
     if start == -1:
         raise ValueError("No JSON found in LLM output")
 
+    end = text.rfind("}")
+    if end < start:
+        raise ValueError("No closing brace found")
+
     try:
-        # Try strict JSON parsing first
-        obj, _ = json.JSONDecoder().raw_decode(text, start)
-        return json.dumps(obj)
-    except Exception:
-        # Fallback: slice between first { and last }
-        end = text.rfind("}")
-        if end == -1:
-             raise ValueError("No closing brace found")
-        return text[start:end+1]
+        # Fast path: object spans first { to last } - parsed with C-accelerated orjson
+        return orjson.loads(text[start:end + 1])
+    except orjson.JSONDecodeError:
+        # Trailing text after the object, or raw control characters inside strings:
+        # the non-strict stdlib decoder accepts both and finds where the object ends
+        try:
+            obj, _ = json.JSONDecoder(strict=False).raw_decode(text, start)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in LLM output: {e}") from e
+        return obj
 
 
 # ---------------------------
@@ -74,51 +285,57 @@ def load_fnol_text(path: str) -> str:
     # Check if file is PDF or plain text
     p = Path(path)
     if p.suffix.lower() == ".pdf":
-        print(f"Extracting text from {path}...")
+        logger.debug("Extracting text from %s...", path)   # Lazy formatting, no stdout flush per claim
         return extract_text_from_pdf(str(p))
     else:
         # Read text file directly
         return p.read_text(encoding="utf-8", errors="ignore")
 
 
+FNOL_TOKEN_BUDGET = 2500   # Leaves room for the prompt head and the JSON answer in n_ctx
+
+
+def prefilter_fnol(text: str) -> List[int]:
+    """Collapse whitespace, drop blank lines and return the text's tokens, capped at FNOL_TOKEN_BUDGET."""
+    # Label lines stay - they tell the model which value belongs to which field
+    lines = (" ".join(line.split()) for line in text.splitlines())   # Collapse runs of spaces/tabs
+    text = "\n".join(line for line in lines if line)
+
+    # Tokenized once here and sent as-is, so the checked budget is exactly what the prompt gets
+    llm = get_llm()
+    budget = min(
+        FNOL_TOKEN_BUDGET,
+        llm.n_ctx() - len(extraction_prefix_tokens) - len(extraction_suffix_tokens) - LLM_MAX_TOKENS
+    )
+    tokens = llm.tokenize(text.encode("utf-8"), add_bos=False)
+    if len(tokens) > budget:
+        logger.warning("FNOL text truncated from %s to %s tokens - the end of the document is dropped",
+                       len(tokens), budget)
+        tokens = tokens[:budget]
+    return tokens
+
+
 # ---------------------------
 # 3. Specialist Agents
 # ---------------------------
 
-def extraction_agent(fnol_text: str) -> Dict:
-
-    prompt = f"""Extract EXACTLY these fields from the FNOL text.
+# Fields the extraction agent returns, per section - drives both the prompt and the grammar
+EXTRACTION_FIELDS = {
+    "Policy Information": ["Policy Number", "Policyholder Name", "Effective Dates"],
+    "Incident Information": ["Date", "Time", "Location", "Description"],
+    "Involved Parties": ["Claimant", "Third Parties", "Contact Details"],
+    "Asset Details": ["Asset Type", "Asset ID", "Estimated Damage"],
+    "Other Mandatory Fields": ["Claim Type", "Attachments", "Initial Estimate"],
+    "Agent Signals": ["_injury", "_fasttrack", "_investigation"],
+}
+
+# Static extraction instructions - identical for every claim, so the FNOL text always follows the
+# same token prefix; get_llm() prefills it once and generate() reuses it from the live context
+EXTRACTION_PROMPT_HEAD = """Extract EXACTLY these fields from the FNOL text.
 Return STRICT JSON with EXACT key names as shown below.
 
 REQUIRED JSON FORMAT:
-{{
-  "Policy Information": {{
-    "Policy Number": null,
-    "Policyholder Name": null,
-    "Effective Dates": null
-  }},
-  "Incident Information": {{
-    "Date": null,
-    "Time": null,
-    "Location": null,
-    "Description": null
-  }},
-  "Involved Parties": {{
-    "Claimant": null,
-    "Third Parties": null,
-    "Contact Details": null
-  }},
-  "Asset Details": {{
-    "Asset Type": null,
-    "Asset ID": null,
-    "Estimated Damage": null
-  }},
-  "Other Mandatory Fields": {{
-    "Claim Type": null,
-    "Attachments": null,
-    "Initial Estimate": null
-  }}
-}}
+""" + json.dumps({section: dict.fromkeys(fields) for section, fields in EXTRACTION_FIELDS.items()}, indent=2) + """
 
 CRITICAL RULES:
 1. Use EXACT key names shown above (including spaces)
@@ -126,40 +343,95 @@ CRITICAL RULES:
 3. Extract only ACTUAL filled-in data values, not form field labels
 4. Use null (not empty string) for blank/missing values
 5. Return ONLY the JSON object - no markdown, no explanation
+6. Fill every "Agent Signals" key with true or false, or null if the text does not tell:
+   - "_injury": the claim involves BODILY INJURY
+   - "_fasttrack": the estimated damage is clearly LESS THAN $25,000
+   - "_investigation": the description shows signs of fraud, a staged accident, or inconsistent statements
 
 FNOL TEXT:
 ----------------
-{fnol_text}
-----------------
 """
-    raw = run_llm(prompt)
-    return json.loads(extract_json(raw))
+EXTRACTION_PROMPT_TAIL = "\n----------------\n"
+
+EXTRACTION_STRING_MAX = 400   # Characters per extracted value - one runaway string can't use up max_tokens
+
+# Grammar-constrained decoding - the model can only emit this exact JSON shape
+# (fixed keys in order, string/null values, boolean/null signals), so no keys are invented
+EXTRACTION_SCHEMA = json.dumps({
+    "type": "object",
+    "properties": {
+        section: {
+            "type": "object",
+            "properties": {
+                field: {"type": ["boolean" if section == "Agent Signals" else "string", "null"]}
+                for field in fields
+            },
+            "required": fields,
+            "additionalProperties": False,
+        }
+        for section, fields in EXTRACTION_FIELDS.items()
+    },
+    "required": list(EXTRACTION_FIELDS),
+    "additionalProperties": False,
+})
+
+
+def build_extraction_grammar() -> LlamaGrammar:
+    """Convert EXTRACTION_SCHEMA to GBNF, banning raw control characters and capping string length."""
+    gbnf = json_schema_to_gbnf(EXTRACTION_SCHEMA)
+    # The generated char rule admits raw \t/\r/\n etc., which JSON forbids inside strings
+    patches = [
+        (r'char ::= [^"\\]', r'char ::= [^"\\\x00-\x1F]'),
+        (r'string ::= "\"" char* "\""', rf'string ::= "\"" char{{0,{EXTRACTION_STRING_MAX}}} "\""'),
+    ]
+    for old, new in patches:
+        if old not in gbnf:
+            raise ValueError(f"Unexpected GBNF from json_schema_to_gbnf, missing: {old}")
+        gbnf = gbnf.replace(old, new)
+    return LlamaGrammar.from_string(gbnf, verbose=False)
+
+
+EXTRACTION_GRAMMAR = build_extraction_grammar()
+
+
+def extraction_agent(fnol_tokens: List[int]) -> Dict:
+    get_llm()
+    # Claim tokens from prefilter_fnol; the fixed head and tail were tokenized at load
+    tokens = extraction_prefix_tokens + fnol_tokens + extraction_suffix_tokens
+    raw = run_llm(tokens, grammar=EXTRACTION_GRAMMAR)
+    return extract_json(raw)
+
+
+# Form labels the LLM sometimes copies as values - built once, not per call
+FORM_LABELS = frozenset({
+    "policy number", "policy_number", "insured", "date of loss", "time of loss",
+    "location of loss", "description of accident", "description of loss",
+    "name of claimant", "contact details", "type of asset", "asset_id",
+    "estimated damage", "estimate amount", "claim_type", "insurance claim",
+    "insured vehicle", "primary e-mail address", "secondary e-mail address",
+    "other vehicle / property damaged", "veh", "date of effective",
+    "effective start date", "effective end date", "third parties",
+    "attachments", "initial estimate", "initial_estimate"
+})
+
+
+def clean_value(v):
+    """Return None for blank values and bare form labels, else the value unchanged."""
+    if v is None:
+        return None
+    if isinstance(v, str):
+        val = v.strip()               # Strip once, reuse for every check
+        if len(val) < 2:              # Cheapest check first
+            return None
+        if val.casefold() in FORM_LABELS:
+            return None
+        if val.isupper() and len(val.split()) <= 3:
+            return None
+    return v
 
 
 def normalize_extracted(extracted: Dict) -> Dict:
     """Clean up form labels that LLM extracts as values."""
-    form_labels = {
-        "policy number", "policy_number", "insured", "date of loss", "time of loss",
-        "location of loss", "description of accident", "description of loss",
-        "name of claimant", "contact details", "type of asset", "asset_id",
-        "estimated damage", "estimate amount", "claim_type", "insurance claim",
-        "insured vehicle", "primary e-mail address", "secondary e-mail address",
-        "other vehicle / property damaged", "veh", "date of effective",
-        "effective start date", "effective end date", "third parties",
-        "attachments", "initial estimate", "initial_estimate"
-    }
-
-    def clean_value(v):
-        if v is None:
-            return None
-        if isinstance(v, str):
-            val = v.strip().lower()
-            if val in form_labels or len(val) < 2:
-                return None
-            if v.strip().isupper() and len(v.strip().split()) <= 3:
-                return None
-        return v
-
     for section in extracted:
         if isinstance(extracted[section], dict):
             for key in extracted[section]:
@@ -168,34 +440,28 @@ def normalize_extracted(extracted: Dict) -> Dict:
     return extracted
 
 
-def completeness_agent(extracted: Dict) -> List[str]:
-    mandatory = [
-        "Policy Number", "Policyholder Name", "Effective Dates",
-        "Date", "Time", "Location", "Description",
-        "Claimant", "Third Parties", "Contact Details",
-        "Asset Type", "Asset ID", "Estimated Damage",
-        "Claim Type", "Attachments", "Initial Estimate"
-    ]
+MANDATORY_FIELDS = [
+    "Policy Number", "Policyholder Name", "Effective Dates",
+    "Date", "Time", "Location", "Description",
+    "Claimant", "Third Parties", "Contact Details",
+    "Asset Type", "Asset ID", "Estimated Damage",
+    "Claim Type", "Attachments", "Initial Estimate"
+]
 
-    # 1. Hybrid Approach: Ask LLM to review completeness
-    prompt = (
-        f"Review the following extracted fields:\n{json.dumps(extracted, indent=2)}\n"
-        f"Are any of these MANDATORY fields missing, empty, or contain placeholders like 'N/A'?\n"
-        f"List: {', '.join(mandatory)}\n"
-        f"If all are present and valid, answer YES. If any are missing, answer NO."
-    )
-    # LLM check (can be used for flagging, currently just logging/logic flow)
-    _ = run_llm_bool(prompt)
-    
-    # 2. Python Fallback (Primary source of truth for list return)
+
+def flatten_extracted(extracted: Dict) -> Dict:
+    """Merge the extraction sections into one field -> value dict, built once per claim."""
     flat = {}
     for section in extracted.values():
         if isinstance(section, dict):
-            for k, v in section.items():
-                flat[k] = v
+            flat.update(section)
+    return flat
+
 
+def completeness_agent(flat: Dict) -> List[str]:
+    # Python check (Primary source of truth for list return)
     missing = []
-    for f in mandatory:
+    for f in MANDATORY_FIELDS:
         v = flat.get(f)
         if v is None or (isinstance(v, str) and v.strip() == ""):
             missing.append(f)
@@ -203,18 +469,22 @@ def completeness_agent(extracted: Dict) -> List[str]:
     return missing
 
 
-def investigation_agent(description: str) -> bool:
-    # 1. Hybrid Approach: Check LLM first
+def investigation_prompt(description: str) -> Optional[str]:
+    # Hybrid Approach: only ask the LLM when there is enough text to judge
     if description and len(description) > 10:
-        prompt = (
+        return (
             f"Analyze this insurance claim description for any clear signs of fraud, "
             f"staged accidents, or inconsistent statements. "
             f"Description: \"{description}\"\n"
             f"Is this suspicious? Answer YES or NO."
         )
-        result = run_llm_bool(prompt)
-        if result is not None:
-            return result
+    return None
+
+
+def investigation_agent(description: str, llm_result: Optional[bool] = None) -> bool:
+    # 1. Hybrid Approach: Trust the LLM answer if it gave one
+    if llm_result is not None:
+        return llm_result
 
     # 2. Fallback: Keyword Analysis
     if not description:
@@ -227,21 +497,27 @@ def investigation_agent(description: str) -> bool:
     return False
 
 
-def injury_agent(extracted: Dict) -> bool:
-    claim_type = extracted.get("Other Mandatory Fields", {}).get("Claim Type")
-    desc = extracted.get("Incident Information", {}).get("Description")
+def injury_prompt(flat: Dict) -> Optional[str]:
+    claim_type = flat.get("Claim Type")
+    desc = flat.get("Description")
 
-    # 1. Hybrid Approach: Check LLM first
+    # Hybrid Approach: ask the LLM whenever there is something to classify
     if claim_type or desc:
-        prompt = (
+        return (
             f"Based on the following info, does this claim involve BODILY INJURY?\n"
             f"Claim Type: {claim_type}\n"
             f"Description: {desc}\n"
             f"Answer YES or NO."
         )
-        result = run_llm_bool(prompt)
-        if result is not None:
-            return result
+    return None
+
+
+def injury_agent(flat: Dict, llm_result: Optional[bool] = None) -> bool:
+    claim_type = flat.get("Claim Type")
+
+    # 1. Hybrid Approach: Trust the LLM answer if it gave one
+    if llm_result is not None:
+        return llm_result
 
     # 2. Fallback: Keyword Analysis
     if not claim_type:
@@ -250,19 +526,29 @@ def injury_agent(extracted: Dict) -> bool:
     return "injury" in str(claim_type).lower()
 
 
-def fasttrack_agent(extracted: Dict) -> bool:
-    # Check if damage is under $25,000 threshold
-    dmg = extracted.get("Asset Details", {}).get("Estimated Damage")
-    
-    # 1. Hybrid Approach: LLM check for value
+# Damage amounts like "$12,500.00" - compiled once for all claims
+NUMBER_RE = re.compile(r"[0-9]+(?:\.[0-9]+)?")
+
+
+def fasttrack_prompt(flat: Dict) -> Optional[str]:
+    dmg = flat.get("Estimated Damage")
+
+    # Hybrid Approach: LLM check for value
     if dmg:
-        prompt = (
+        return (
             f"Extract the estimated damage amount from: \"{dmg}\"\n"
             f"Is it clearly LESS THAN $25,000? Answer YES or NO."
         )
-        result = run_llm_bool(prompt)
-        if result is not None:
-            return result
+    return None
+
+
+def fasttrack_agent(flat: Dict, llm_result: Optional[bool] = None) -> bool:
+    # Check if damage is under $25,000 threshold
+    dmg = flat.get("Estimated Damage")
+
+    # 1. Hybrid Approach: Trust the LLM answer if it gave one
+    if llm_result is not None:
+        return llm_result
 
     # 2. Fallback: Deterministic parsing
     if dmg is None:
@@ -272,7 +558,7 @@ def fasttrack_agent(extracted: Dict) -> bool:
         return dmg < 25000
 
     s = str(dmg)
-    nums = re.findall(r"[0-9]+(?:\.[0-9]+)?", s.replace(",", ""))
+    nums = NUMBER_RE.findall(s.replace(",", ""))
     if not nums:
         return False
 
@@ -287,6 +573,14 @@ def fasttrack_agent(extracted: Dict) -> bool:
 # 4. Coordinator
 # ---------------------------
 
+def read_signal(signals: Optional[Dict], key: str) -> Optional[bool]:
+    """Return an "Agent Signals" boolean from the extraction output, or None if absent/invalid."""
+    if not isinstance(signals, dict):
+        return None
+    value = signals.get(key)
+    return value if isinstance(value, bool) else None
+
+
 def decide_route(
     extracted: Dict,
     missing: List[str],
@@ -315,22 +609,42 @@ def decide_route(
 
 def process_fnol(file_path: str):
     # Main pipeline: extract text → analyze → route
-    fnol_text = load_fnol_text(file_path)
+    fnol_tokens = prefilter_fnol(load_fnol_text(file_path))
 
-    extracted = extraction_agent(fnol_text)
+    extracted = extraction_agent(fnol_tokens)
+    signals = extracted.pop("Agent Signals", None)   # Agent answers from the same LLM call
     extracted = normalize_extracted(extracted)
 
-    missing = completeness_agent(extracted)
-
-    description = (
-        extracted
-        .get("Incident Information", {})
-        .get("Description")
-    )
+    # One flat field view shared by every agent
+    flat = flatten_extracted(extracted)
+    description = flat.get("Description")
+
+    # Same pre-checks as before: an agent only consults the LLM when it would build a prompt
+    inv_prompt = investigation_prompt(description)
+    inj_prompt = injury_prompt(flat)
+    ft_prompt = fasttrack_prompt(flat)
+
+    # A signal stands in for that LLM answer only; otherwise the agent's rule check decides
+    investigation_llm = read_signal(signals, "_investigation") if inv_prompt else None
+    injury_llm = read_signal(signals, "_injury") if inj_prompt else None
+    fasttrack_llm = read_signal(signals, "_fasttrack") if ft_prompt else None
+
+    # Only agents the extraction call left undecided get a batched Yes/No question
+    prompts = [
+        inv_prompt if investigation_llm is None else None,
+        inj_prompt if injury_llm is None else None,
+        ft_prompt if fasttrack_llm is None else None,
+    ]
+    if any(prompts):
+        answers = run_llm_bool_batch(prompts)
+        investigation_llm = answers[0] if investigation_llm is None else investigation_llm
+        injury_llm = answers[1] if injury_llm is None else injury_llm
+        fasttrack_llm = answers[2] if fasttrack_llm is None else fasttrack_llm
 
-    investigation = investigation_agent(description)
-    injury = injury_agent(extracted)
-    fasttrack = fasttrack_agent(extracted)
+    missing = completeness_agent(flat)
+    investigation = investigation_agent(description, investigation_llm)
+    injury = injury_agent(flat, injury_llm)
+    fasttrack = fasttrack_agent(flat, fasttrack_llm)
 
     route, reason = decide_route(
         extracted,
@@ -350,18 +664,64 @@ def process_fnol(file_path: str):
     return final_output
 
 
+def configure_worker(n_threads: int, log_level: Optional[int] = None) -> None:
+    """Process-pool initializer: size each worker's model threads and logging before it loads."""
+    global LLM_THREADS, USE_MMAP
+    LLM_THREADS = n_threads
+    USE_MMAP = True    # Workers share the page-cached weights instead of each holding a copy
+    if log_level is not None:
+        # Spawned workers (Windows/macOS) start unconfigured; a no-op where fork copied the handler
+        logging.basicConfig(level=log_level, format=LOG_FORMAT)
+
+
+def process_fnol_safe(file_path: str) -> Dict:
+    """Batch-mode wrapper: one failing claim returns an error record instead of aborting the batch."""
+    try:
+        return process_fnol(file_path)
+    except Exception as e:
+        logger.error("Failed to process %s: %s", file_path, e)
+        return {
+            "file": file_path,
+            "error": f"{type(e).__name__}: {e}",
+            "recommendedRoute": "Manual review",
+            "reasoning": "Automated processing failed."
+        }
+
+
+def process_batch(paths: List[str], threads_per_llm: int = 2) -> List[Dict]:
+    """Process several claim files in parallel, one model instance per worker process."""
+    workers = max(1, min(len(paths), (os.cpu_count() or 1) // threads_per_llm))
+    if llama_cpp.llama_supports_gpu_offload():
+        workers = min(workers, GPU_BATCH_WORKERS)   # Models load with n_gpu_layers=-1
+    root = logging.getLogger()
+    log_level = root.level if root.handlers else None   # Mirror the caller's logging, if any
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=configure_worker,
+        initargs=(threads_per_llm, log_level)
+    ) as executor:
+        return list(executor.map(process_fnol_safe, paths))   # Results keep input order
+
+
 if __name__ == "__main__":
     import time
     start = time.time()
 
-    # Build path to test PDF in data folder
-    pdf_path = os.path.join(os.path.dirname(__file__), "data", "ACORD-Automobile-Loss-Notice-12.05.16.pdf")
-    
-    if not os.path.exists(pdf_path):
-        # Fallback to current dir if data folder usage varies
-        pdf_path = "ACORD-Automobile-Loss-Notice-12.05.16.pdf"
-        
-    result = process_fnol(pdf_path)
+    # One handler for the whole run - process_batch passes the same setup to its workers
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+
+    # Claim files from the command line, else the test PDF in data folder
+    paths = sys.argv[1:]
+    if not paths:
+        pdf_path = os.path.join(os.path.dirname(__file__), "data", "ACORD-Automobile-Loss-Notice-12.05.16.pdf")
+
+        if not os.path.exists(pdf_path):
+            # Fallback to current dir if data folder usage varies
+            pdf_path = "ACORD-Automobile-Loss-Notice-12.05.16.pdf"
+        paths = [pdf_path]
+
+    # Several claims: one worker process per claim; single claim: run in-process
+    result = process_batch(paths) if len(paths) > 1 else process_fnol(paths[0])
 
     elapsed = time.time() - start
 